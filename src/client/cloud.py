@@ -1,10 +1,51 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import os
+import shutil
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, NamedTuple
+from typing import Any, NamedTuple, Self
 
+import orjson
+import requests
 from requests.models import Response
+from urllib3.util.retry import Retry
+
+UPLOAD_WORKERS = 8
+# Минимальный размер пула соединений на хост; при большем числе потоков пул растет вместе с ним
+POOL_MAXSIZE = 20
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+JSON_HEADERS = {"Content-Type": "application/json"}
+RETRY_POLICY = Retry(
+    total=5,
+    backoff_factor=1.0,
+    # Случайная добавка к паузе, чтобы параллельные потоки не повторяли запросы одновременно
+    backoff_jitter=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+
+def parse_json(response: Response) -> Any:
+    """Разбирает JSON-тело ответа с помощью orjson (быстрее, чем response.json())"""
+    return orjson.loads(response.content)
+
+
+def is_same_file(entry: os.DirEntry[str], remote_size: int | str | None, remote_md5: str | None) -> bool:
+    """
+    Сравнивает локальный файл с файлом в облаке по размеру и MD5.
+    MD5 считается только при совпадении размера, поэтому измененные файлы обычно не читаются целиком.
+    """
+    if remote_size is None or remote_md5 is None or entry.stat().st_size != int(remote_size):
+        return False
+
+    with open(entry.path, "rb") as f:
+        local_md5 = hashlib.file_digest(f, lambda: hashlib.md5(usedforsecurity=False)).hexdigest()
+    return local_md5 == remote_md5
 
 
 class ListFilesResult(NamedTuple):
@@ -17,6 +58,28 @@ class ListFilesResult(NamedTuple):
 class CloudClient(ABC):
     """Абстрактный класс для работы с облачными Дисками"""
 
+    _session: requests.Session
+
+    def close(self) -> None:
+        """Закрывает HTTP-сессию и ее пул соединений"""
+        self._session.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @staticmethod
+    def _save_stream(response: Response, download_path: Path) -> None:
+        """
+        Сохраняет потоковый ответ в файл блоками по DOWNLOAD_CHUNK_SIZE, сжатие снимается urllib3.
+        Запись идет через буферизованный файл: он дописывает блок целиком, даже если os.write записал его частично.
+        """
+        response.raw.decode_content = True
+        with download_path.open("wb") as f:
+            shutil.copyfileobj(response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+
     @abstractmethod
     def check_disk_access(self) -> Response:
         """Проверяет доступ к облаку"""
@@ -47,5 +110,21 @@ class CloudClient(ABC):
 
     @abstractmethod
     def list_files(self, remote_path: Path | None = None) -> ListFilesResult:
-        """Список файлов в облаке"""
+        """Список файлов в облаке. Если папки нет, возвращается ответ с ошибкой и files=None"""
         pass
+
+    async def upload_file_async(self, local_path: Path | None, remote_path: Path | None) -> Response:
+        """Асинхронная обертка над upload_file: запрос выполняется в отдельном потоке"""
+        return await asyncio.to_thread(self.upload_file, local_path, remote_path)
+
+    async def upload_folder_async(self, local_folder: Path | None, remote_folder: Path | None) -> list[Response]:
+        """Асинхронная обертка над upload_folder"""
+        return await asyncio.to_thread(self.upload_folder, local_folder, remote_folder)
+
+    async def download_file_async(self, remote_path: Path | None, local_path: Path | None) -> Response:
+        """Асинхронная обертка над download_file"""
+        return await asyncio.to_thread(self.download_file, remote_path, local_path)
+
+    async def list_files_async(self, remote_path: Path | None = None) -> ListFilesResult:
+        """Асинхронная обертка над list_files"""
+        return await asyncio.to_thread(self.list_files, remote_path)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+FOLDER_CACHE_FILE = Path.home() / ".cache" / "taskcloud" / "gdrive_folders.json"
+FOLDER_CACHE_TTL = 24 * 60 * 60
+
+
+class FolderCache:
+    """
+    Хранит ID папок между запусками в JSON-файле вида {аккаунт: {путь: [ID, время записи]}}.
+    Записи старше ttl секунд считаются устаревшими и не загружаются.
+    При записи в файле остаются только актуальные записи текущего аккаунта.
+    """
+
+    def __init__(self, cache_file: Path, account: str, ttl: float = FOLDER_CACHE_TTL) -> None:
+        self._cache_file = cache_file
+        self._account = account
+        self._ttl = ttl
+        self._lock = threading.Lock()
+
+    def load(self) -> dict[str, str]:
+        """Возвращает актуальные записи {путь: ID} текущего аккаунта"""
+        return {path: folder_id for path, (folder_id, _) in self._fresh_entries().items()}
+
+    def update(self, folders: dict[str, str]) -> None:
+        """Добавляет или обновляет записи {путь: ID}"""
+        if not folders:
+            return
+
+        now = time.time()
+        with self._lock:
+            entries = self._fresh_entries()
+            entries.update({path: [folder_id, now] for path, folder_id in folders.items()})
+            self._write({self._account: entries})
+
+    def discard(self, prefix: str) -> None:
+        """Удаляет запись папки и всех вложенных в нее папок"""
+        with self._lock:
+            entries = self._fresh_entries()
+            stale = [path for path in entries if path == prefix or path.startswith(f"{prefix}/")]
+            if not stale:
+                return
+
+            for path in stale:
+                del entries[path]
+            self._write({self._account: entries})
+
+    def _fresh_entries(self) -> dict[str, list[Any]]:
+        """Читает записи текущего аккаунта {путь: [ID, время записи]}, отбрасывая устаревшие"""
+        now = time.time()
+        entries = self._read().get(self._account, {})
+        return {path: entry for path, entry in entries.items() if now - entry[1] < self._ttl}
+
+    def _read(self) -> dict[str, dict[str, list[Any]]]:
+        """Читает файл кэша; отсутствующий или поврежденный файл считается пустым"""
+        try:
+            data = orjson.loads(self._cache_file.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, data: dict[str, dict[str, list[Any]]]) -> None:
+        """Атомарно перезаписывает файл кэша, ошибки записи не мешают работе клиента"""
+        try:
+            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self._cache_file.with_name(f"{self._cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_file.write_bytes(orjson.dumps(data))
+            os.replace(tmp_file, self._cache_file)
+        except OSError:
+            pass
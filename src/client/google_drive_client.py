@@ -1,13 +1,59 @@
 from __future__ import annotations
 
+import mmap
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from email import policy
+from email.parser import BytesParser
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, cast
+from urllib.parse import urlsplit
 
+import orjson
 import requests
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from requests.models import Response
-
-from src.client.cloud import CloudClient, ListFilesResult
+from requests.structures import CaseInsensitiveDict
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+
+from src.client.cloud import (
+    JSON_HEADERS,
+    POOL_MAXSIZE,
+    RETRY_POLICY,
+    UPLOAD_WORKERS,
+    CloudClient,
+    ListFilesResult,
+    is_same_file,
+    parse_json,
+)
+from src.client.folder_cache import FOLDER_CACHE_FILE, FolderCache
+from src.client.rate_limiter import RateLimitedAdapter, RateLimiter
+
+BATCH_LIMIT = 100
+RESUMABLE_THRESHOLD = 5 * 1024 * 1024
+# Размер части resumable-загрузки должен быть кратен 256 KiB
+RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024
+RESUMABLE_MAX_ATTEMPTS = 5
+# Квота Google Drive API: 1000 запросов за 100 секунд на пользователя
+RATE_LIMIT_REQUESTS = 1000
+RATE_LIMIT_PERIOD = 100
+
+
+# Шаблоны запросов Google Drive, значения подставляются только через _quote
+QUERY_CHILDREN = "{parent} in parents and trashed=false"
+QUERY_CHILD_BY_NAME = "name={name} and {parent} in parents and trashed=false"
+QUERY_ONLY_MIME_TYPE = " and mimeType={mime_type}"
+QUERY_EXCEPT_MIME_TYPE = " and mimeType!={mime_type}"
+QUERY_FOLDERS_BY_NAMES = "({names}) and mimeType={mime_type} and trashed=false"
+
+
+def _quote(value: str) -> str:
+    """Оборачивает строку в кавычки для языка запросов Google Drive, экранируя обратный слэш и апострофы"""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
 
 
 class GoogleSettings(BaseSettings):
@@ -18,85 +64,205 @@ class GoogleSettings(BaseSettings):
     upload_url: str
     resources_endpoint: str
     mime_type: str
+    batch_url: str = "https://www.googleapis.com/batch/drive/v3"
+    folder_cache_file: Path = FOLDER_CACHE_FILE
     model_config = SettingsConfigDict(env_file="googleSettings.env", env_prefix='GOOGLE_')
 
 
+@lru_cache(maxsize=1)
+def _get_settings() -> GoogleSettings:
+    """Читает настройки один раз на процесс, а не при создании каждого клиента"""
+    return GoogleSettings()  # type: ignore
+
+
 class GoogleDriveClient(CloudClient):
     """Класс для работы с Гугл Диском"""
 
-    def __init__(self) -> None:
-        self._settings = GoogleSettings()  # type: ignore
+    def __init__(self, max_workers: int = UPLOAD_WORKERS) -> None:
+        self._settings = _get_settings()
+        self._max_workers = max_workers
         self._headers = {
             "Authorization": f"Bearer {self._settings.access_token}",
             "Accept": "application/json",
         }
         self._mime_type = self._settings.mime_type
         self._base_url = self._settings.base_url
+        self._resources_url = f"{self._base_url}{self._settings.resources_endpoint}"
+        self._resources_path = urlsplit(self._resources_url).path
+        self._upload_url = self._settings.upload_url
+        limiter = RateLimiter(RATE_LIMIT_REQUESTS, RATE_LIMIT_PERIOD)
+        pool_maxsize = max(max_workers, POOL_MAXSIZE)
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            RateLimitedAdapter(limiter, pool_connections=10, pool_maxsize=pool_maxsize, max_retries=RETRY_POLICY),
+        )
+        # Тело загрузки читается из файла потоком и не может быть отправлено повторно
+        self._session.mount(
+            self._settings.upload_url,
+            RateLimitedAdapter(limiter, pool_maxsize=pool_maxsize, max_retries=0),
+        )
+        self._session.headers.update(self._headers)
+        # permissionId пользователя: ключ кэша на диске, который, в отличие от токена, не меняется каждый час
+        self._account_id: str | None = None
+        self._folder_store: FolderCache | None = None
+        # Под ключом "" хранится настоящий ID корня: в parents Drive указывает его, а не псевдоним root
+        self._folder_id_cache: dict[str, str] = {}
+        # Защищает от создания дублей папок при параллельных загрузках в один и тот же путь
+        self._folder_lock = threading.RLock()
+        self._etag_cache: dict[str, tuple[str, ListFilesResult]] = {}
 
     def check_disk_access(self) -> Response:
         """Проверка доступности Google Drive"""
-        url = f"{self._base_url}/about?fields=user"
-        return requests.get(url, headers=self._headers)
+        response = self._session.get(f"{self._base_url}/about", params={"fields": "user"})
+        if response.status_code == 200:
+            self._account_id = parse_json(response)["user"]["permissionId"]
+        return response
+
+    def _get_folder_store(self) -> FolderCache:
+        """
+        Возвращает кэш ID папок на диске, при первом обращении загружая из него записи текущего аккаунта.
+        Аккаунт определяется по permissionId, чтобы ID папок разных аккаунтов не смешивались.
+        """
+        with self._folder_lock:
+            if self._folder_store is None:
+                if self._account_id is None:
+                    response = self._session.get(f"{self._base_url}/about", params={"fields": "user(permissionId)"})
+                    response.raise_for_status()
+                    self._account_id = cast(str, parse_json(response)["user"]["permissionId"])
+                self._folder_store = FolderCache(self._settings.folder_cache_file, self._account_id)
+                self._folder_id_cache = {**self._folder_store.load(), **self._folder_id_cache}
+            return self._folder_store
 
     def _ensure_path_exists(self, remote_path: Path | None) -> str:
+        """Создает папки (если их нет) и возвращает ID последней папки в пути"""
+        with self._folder_lock:
+            return cast(str, self._resolve_folder_id(remote_path, create=True))
+
+    def _find_folder_id(self, remote_path: Path | None) -> str | None:
+        """Возвращает ID папки по пути или None, если ее нет. Ничего не создает на диске"""
+        return self._resolve_folder_id(remote_path, create=False)
+
+    def _resolve_folder_id(self, remote_path: Path | None, create: bool) -> str | None:
         """
-        Создает папки (если их нет) и возвращает ID последней папки в пути
+        Находит ID последней папки в пути, при create=True создавая недостающие.
+        Обход начинается с самого глубокого закэшированного префикса, а все кандидаты
+        для оставшихся частей пути запрашиваются одним запросом и связываются по parents локально.
         """
         if not remote_path or str(remote_path) == ".":
             return "root"
 
-        parent_id = "root"
         parts = [p for p in remote_path.parts if p != '/']
+        folder_store = self._get_folder_store()
+
+        depth = len(parts)
+        while depth and "/".join(parts[:depth]) not in self._folder_id_cache:
+            depth -= 1
+        parent_id = self._folder_id_cache["/".join(parts[:depth])] if depth else self._get_root_id()
+
+        candidates = self._find_folder_candidates(parts[depth:]) if depth < len(parts) else []
+        created = False
+        resolved: dict[str, str] = {}
+
+        for index in range(depth, len(parts)):
+            part = parts[index]
+            folder_id = None
+            if not created:
+                folder_id = next(
+                    (f["id"] for f in candidates if f["name"] == part and parent_id in f.get("parents", [])),
+                    None,
+                )
 
-        for part in parts:
-            query = {
-                "q": f"name='{part}' and '{parent_id}' in parents "
-                     f"and mimeType='{self._mime_type}' "
-                     f"and trashed=false",
-                "fields": "files(id)",
-            }
-            url = f"{self._base_url}{self._settings.resources_endpoint}"
-            response = requests.get(
-                url, headers=self._headers, params=query
-            )
-            folders = response.json().get("files", [])
+            if folder_id is None:
+                if not create:
+                    return None
 
-            if folders:
-                parent_id = folders[0]["id"]
-            else:
                 metadata = {
                     "name": part,
                     "mimeType": self._mime_type,
                     "parents": [parent_id],
                 }
-                url = f"{self._base_url}{self._settings.resources_endpoint}"
-                response = requests.post(
-                    url,
-                    headers=self._headers,
-                    json=metadata,
-                )
-                parent_id = response.json()["id"]
+                response = self._session.post(self._resources_url, data=orjson.dumps(metadata), headers=JSON_HEADERS)
+                response.raise_for_status()
+                folder_id = parse_json(response)["id"]
+                created = True
+
+            parent_id = folder_id
+            resolved["/".join(parts[: index + 1])] = parent_id
 
+        self._folder_id_cache.update(resolved)
+        folder_store.update(resolved)
         return parent_id
 
+    def _get_root_id(self) -> str:
+        """Возвращает настоящий ID корня Диска, запрашивая его один раз"""
+        root_id = self._folder_id_cache.get("")
+        if root_id is None:
+            response = self._session.get(f"{self._resources_url}/root", params={"fields": "id"})
+            response.raise_for_status()
+            root_id = cast(str, parse_json(response)["id"])
+            self._folder_id_cache[""] = root_id
+            self._get_folder_store().update({"": root_id})
+        return root_id
+
+    def _find_folder_candidates(self, names: list[str]) -> list[dict[str, Any]]:
+        """Одним запросом возвращает все папки с любым из указанных имен"""
+        names_query = " or ".join(f"name={_quote(name)}" for name in dict.fromkeys(names))
+        query: dict[str, str | int] = {
+            "q": QUERY_FOLDERS_BY_NAMES.format(names=names_query, mime_type=_quote(self._mime_type)),
+            "fields": "nextPageToken,files(id,name,parents)",
+            "pageSize": 1000,
+        }
+
+        folders: list[dict[str, Any]] = []
+        while True:
+            response = self._session.get(self._resources_url, params=query)
+            response.raise_for_status()
+            data = parse_json(response)
+            folders.extend(data.get("files", []))
+
+            if "nextPageToken" not in data:
+                return folders
+            query["pageToken"] = data["nextPageToken"]
+
+    def _forget_folder(self, remote_path: Path) -> None:
+        """Удаляет из кэша ID папки и всех вложенных в нее папок (например, после ее удаления)"""
+        prefix = remote_path.as_posix().strip("/")
+        self._get_folder_store().discard(prefix)
+        for cache_key in list(self._folder_id_cache):
+            if cache_key == prefix or cache_key.startswith(f"{prefix}/"):
+                del self._folder_id_cache[cache_key]
+
+    def _get_file_id(self, path: Path, folder: bool | None = None) -> str | None:
+        """
+        Возвращает ID файла/папки по пути или None, если его нет.
+        Имя ищется одним запросом в родительской папке с pageSize=1. Если одноименны папка и файл,
+        нужный тип задается через folder: True — только папки, False — только файлы, None — любой.
+        """
+        parent_id = self._find_folder_id(path.parent)
+        if parent_id is None:
+            return None
+
+        name_query = QUERY_CHILD_BY_NAME.format(name=_quote(path.name), parent=_quote(parent_id))
+        if folder is not None:
+            mime_type_query = QUERY_ONLY_MIME_TYPE if folder else QUERY_EXCEPT_MIME_TYPE
+            name_query += mime_type_query.format(mime_type=_quote(self._mime_type))
+        query = {
+            "q": name_query,
+            "fields": "files(id)",
+            "pageSize": "1",
+        }
+        response = self._session.get(self._resources_url, params=query)
+        response.raise_for_status()
+        items = parse_json(response).get("files", [])
+        return cast(str, items[0]["id"]) if items else None
+
     def _path_exists(self, path: Path | None) -> bool:
         """Проверяет существование файла/папки"""
         if not path:
             return False
 
-        filename = path.name
-        parent_path = path.parent
-        parent_id = self._ensure_path_exists(parent_path)
-
-        query = {
-            "q": f"name='{filename}' and '{parent_id}' in parents and trashed=false",
-            "fields": "files(id)",
-        }
-        url = f"{self._base_url}{self._settings.resources_endpoint}"
-        response = requests.get(
-            url, headers=self._headers, params=query
-        )
-        return bool(response.json().get("files"))
+        return self._get_file_id(path) is not None
 
     def upload_file(self, local_path: Path | None, remote_path: Path | None) -> Response:
         """Загрузка файла на Google Drive"""
@@ -108,114 +274,330 @@ class GoogleDriveClient(CloudClient):
         filename = remote_path.name if remote_path else local_path.name
         parent_path = remote_path.parent if remote_path else None
         parent_id = self._ensure_path_exists(parent_path)
+        response = self._upload_file_to_parent(local_path, filename, parent_id)
 
-        metadata = {"name": filename, "parents": [parent_id]}
+        if response.status_code == 404 and parent_path:
+            # ID из кэша устарел: папку или ее предка удалили вне клиента, поэтому путь создается заново
+            for stale_path in (parent_path, *parent_path.parents):
+                self._forget_folder(stale_path)
+            parent_id = self._ensure_path_exists(parent_path)
+            response = self._upload_file_to_parent(local_path, filename, parent_id)
 
-        print(metadata)
-        with local_path.open("rb") as f:
-            files: dict[str, tuple[str, Any, str]] = {
-                "metadata": ("metadata", str(metadata), "application/json"),
-                "file": (filename, f, "application/octet-stream"),
-            }
-            url = f"{self._settings.upload_url}?uploadType=multipart"
-            response = requests.post(
-                url,
-                headers=self._headers,
-                files=files,
-            )
+        return response
+
+    def _upload_file_to_parent(
+        self, local_path: Path, filename: str, parent_id: str, file_id: str | None = None
+    ) -> Response:
+        """Загружает файл в папку с уже известным ID, а если передан file_id — заменяет содержимое этого файла"""
+        metadata: dict[str, Any]
+        if file_id is None:
+            method, upload_url = "POST", self._upload_url
+            metadata = {"name": filename, "parents": [parent_id]}
+        else:
+            # Существующий файл обновляется PATCH-запросом, parents в его теле не допускается
+            method, upload_url = "PATCH", f"{self._upload_url}/{file_id}"
+            metadata = {"name": filename}
+
+        if local_path.stat().st_size > RESUMABLE_THRESHOLD:
+            response = self._upload_resumable(local_path, metadata, method, upload_url)
+        else:
+            with local_path.open("rb") as f:
+                encoder = MultipartEncoder(
+                    fields={
+                        "metadata": (None, orjson.dumps(metadata), "application/json"),
+                        "file": (filename, f, "application/octet-stream"),
+                    }
+                )
+                response = self._session.request(
+                    method,
+                    f"{upload_url}?uploadType=multipart",
+                    data=encoder,
+                    headers={"Content-Type": encoder.content_type},
+                )
 
         return response
 
+    def _upload_resumable(self, local_path: Path, metadata: dict[str, Any], method: str, upload_url: str) -> Response:
+        """
+        Загружает большой файл по протоколу resumable upload частями по RESUMABLE_CHUNK_SIZE.
+        Файл отображается в память (mmap), и каждая часть отправляется как срез memoryview без копирования в Python.
+        При обрыве соединения или ошибке сервера запрашивает, сколько байт уже принято, и продолжает с этого места.
+        Сессия открывается запросом method: POST создает новый файл, PATCH обновляет существующий.
+        """
+        total = local_path.stat().st_size
+        response = self._session.request(
+            method,
+            f"{upload_url}?uploadType=resumable",
+            data=orjson.dumps(metadata),
+            headers={**JSON_HEADERS, "X-Upload-Content-Length": str(total)},
+        )
+        if response.status_code != 200:
+            return response
+
+        session_url = response.headers["Location"]
+        offset = 0
+        attempts = 0
+        resume = False
+
+        with (
+            local_path.open("rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+            memoryview(mapped) as view,
+        ):
+            while True:
+                try:
+                    if resume:
+                        response = self._session.put(session_url, headers={"Content-Range": f"bytes */{total}"})
+                    else:
+                        # Срез освобождается сразу после запроса, иначе mmap нельзя будет закрыть
+                        with view[offset : offset + RESUMABLE_CHUNK_SIZE] as chunk:
+                            content_range = f"bytes {offset}-{offset + len(chunk) - 1}/{total}"
+                            response = self._session.put(
+                                session_url,
+                                data=chunk,  # type: ignore[arg-type]
+                                headers={"Content-Range": content_range},
+                            )
+
+                    if response.status_code in RETRY_POLICY.status_forcelist:
+                        raise requests.HTTPError(response=response)
+                except (requests.ConnectionError, requests.Timeout, requests.HTTPError):
+                    attempts += 1
+                    if attempts > RESUMABLE_MAX_ATTEMPTS:
+                        raise
+                    time.sleep(RETRY_POLICY.backoff_factor * 2 ** (attempts - 1))
+                    resume = True
+                    continue
+
+                attempts = 0
+                resume = False
+                if response.status_code != 308:
+                    return response
+
+                # Range: bytes=0-N — сервер принял байты с 0 по N включительно
+                received = response.headers.get("Range")
+                offset = int(received.rsplit("-", 1)[1]) + 1 if received else 0
+
     def upload_folder(self, local_folder: Path | None, remote_folder: Path | None) -> list[Response]:
-        """Рекурсивная загрузка папки с содержимым"""
+        """
+        Рекурсивная загрузка папки с содержимым.
+
+        Сначала создается дерево папок: по одному batch-запросу на уровень вложенности
+        (дочерним папкам нужен ID родителя), затем файлы загружаются параллельно.
+        Уже существующие папки переиспользуются, файлы с тем же размером и MD5 повторно не загружаются,
+        а измененные файлы обновляются на месте.
+        """
 
         if not local_folder:
             raise NotADirectoryError(f"Локальная папка не найдена: {local_folder}")
 
-        responses = []
+        responses: list[Response] = []
+        # (локальный путь, имя, ID папки на Диске, ID существующего файла, если его нужно обновить)
+        uploads: list[tuple[Path, str, str, str | None]] = []
         root_folder_id = self._ensure_path_exists(remote_folder)
-        folder_stack = [(local_folder, root_folder_id)]
+        root_key = "/".join(p for p in remote_folder.parts if p != '/') if remote_folder else ""
+        # (локальный путь, ID папки на Диске, ключ папки в кэше ID, могла ли папка существовать раньше)
+        folder_level: list[tuple[str, str, str, bool]] = [(str(local_folder), root_folder_id, root_key, True)]
+
+        while folder_level:
+            subfolders: list[tuple[os.DirEntry[str], str, str]] = []
+            next_level: list[tuple[str, str, str, bool]] = []
+
+            for current_local, current_remote_id, current_key, may_exist in folder_level:
+                # Только что созданные папки пусты, листинг нужен лишь для уже существовавших
+                existing = self._list_children(current_remote_id) if may_exist else {}
+
+                with os.scandir(current_local) as entries:
+                    for entry in entries:
+                        remote_item = existing.get(entry.name)
+                        is_remote_folder = remote_item is not None and remote_item["mimeType"] == self._mime_type
+
+                        if entry.is_dir():
+                            if remote_item is not None and is_remote_folder:
+                                key = f"{current_key}/{entry.name}" if current_key else entry.name
+                                next_level.append((entry.path, remote_item["id"], key, True))
+                            else:
+                                subfolders.append((entry, current_remote_id, current_key))
+                        elif remote_item is None or is_remote_folder:
+                            uploads.append((Path(entry.path), entry.name, current_remote_id, None))
+                        elif not is_same_file(entry, remote_item.get("size"), remote_item.get("md5Checksum")):
+                            # Измененный файл обновляется на месте, иначе на Диске появился бы второй с тем же именем
+                            uploads.append((Path(entry.path), entry.name, current_remote_id, remote_item["id"]))
+
+            folder_responses = self._create_folders([(entry.name, parent_id) for entry, parent_id, _ in subfolders])
+            responses.extend(folder_responses)
+            next_level.extend(
+                (
+                    entry.path,
+                    parse_json(response)["id"],
+                    f"{parent_key}/{entry.name}" if parent_key else entry.name,
+                    False,
+                )
+                for (entry, _, parent_key), response in zip(subfolders, folder_responses)
+                if response.status_code == 200
+            )
+            folder_level = next_level
 
-        while folder_stack:
-            current_local, current_remote_id = folder_stack.pop()
+            # Найденные и созданные папки сразу попадают в кэш: последующие загрузки в них не ищут путь заново
+            known = {key: folder_id for _, folder_id, key, _ in folder_level}
+            self._folder_id_cache.update(known)
+            self._get_folder_store().update(known)
 
-            for item in current_local.iterdir():
-                relative_path = item.relative_to(local_folder)
-                remote_item_path = Path(remote_folder) / relative_path if remote_folder else relative_path
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            responses.extend(executor.map(lambda args: self._upload_file_to_parent(*args), uploads))
 
-                if item.is_dir():
-                    metadata = {
-                        "name": item.name,
-                        "mimeType": self._mime_type,
-                        "parents": [current_remote_id],
-                    }
-                    url = f"{self._base_url}{self._settings.resources_endpoint}"
-                    response = requests.post(
-                        url,
-                        headers=self._headers,
-                        json=metadata,
-                    )
-                    responses.append(response)
-
-                    if response.status_code == 200:
-                        folder_stack.append((item, response.json()["id"]))
-                else:
-                    response = self.upload_file(item, remote_item_path)
-                    responses.append(response)
+        return responses
+
+    def _list_children(self, parent_id: str) -> dict[str, dict[str, Any]]:
+        """
+        Возвращает содержимое папки в виде {имя: файл} с размером и MD5.
+        Если папка и файл называются одинаково, предпочтение отдается папке,
+        а из нескольких одноименных файлов выбирается последний измененный.
+        """
+        children: dict[str, dict[str, Any]] = {}
+        query: dict[str, str | int] = {
+            "q": QUERY_CHILDREN.format(parent=_quote(parent_id)),
+            "fields": "nextPageToken,files(id,name,mimeType,size,md5Checksum)",
+            "orderBy": "modifiedTime desc",
+            "pageSize": 1000,
+        }
+
+        while True:
+            response = self._session.get(self._resources_url, params=query)
+            response.raise_for_status()
+            data = parse_json(response)
+            for item in data.get("files", []):
+                if item["name"] not in children or item["mimeType"] == self._mime_type:
+                    children[item["name"]] = item
+
+            if "nextPageToken" not in data:
+                return children
+            query["pageToken"] = data["nextPageToken"]
+
+    def _create_folders(self, folders: list[tuple[str, str]]) -> list[Response]:
+        """Создает папки (имя, ID родителя) batch-запросами, ответы возвращаются в том же порядке"""
+        sub_requests = [
+            {
+                "method": "POST",
+                "path": self._resources_path,
+                "body": {"name": name, "mimeType": self._mime_type, "parents": [parent_id]},
+            }
+            for name, parent_id in folders
+        ]
+
+        # Папки одного уровня независимы, поэтому batch-запросы уровня отправляются параллельно
+        batches = [sub_requests[start : start + BATCH_LIMIT] for start in range(0, len(sub_requests), BATCH_LIMIT)]
+        responses = []
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            for batch_responses in executor.map(self._batch_request, batches):
+                responses.extend(batch_responses)
 
         return responses
 
+    def _batch_request(self, sub_requests: list[dict[str, Any]]) -> list[Response]:
+        """
+        Отправляет до BATCH_LIMIT запросов одним HTTP-запросом на batch-endpoint Google Drive
+        и возвращает ответы на них в порядке запросов
+        """
+        if not sub_requests:
+            return []
+
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for index, sub_request in enumerate(sub_requests):
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <item{index}>\r\n\r\n"
+                f"{sub_request['method']} {sub_request['path']}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{orjson.dumps(sub_request['body']).decode()}\r\n"
+            )
+        parts.append(f"--{boundary}--\r\n")
+
+        batch_response = self._session.post(
+            self._settings.batch_url,
+            data="".join(parts).encode(),
+            headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+        )
+        batch_response.raise_for_status()
+
+        message = BytesParser(policy=policy.HTTP).parsebytes(
+            f"Content-Type: {batch_response.headers['Content-Type']}\r\n\r\n".encode() + batch_response.content
+        )
+        responses: dict[int, Response] = {}
+        for part in message.iter_parts():
+            index = int(part["Content-ID"].strip("<>").removeprefix("response-item"))
+            responses[index] = self._parse_batch_part(cast(bytes, part.get_payload(decode=True)), batch_response.url)
+
+        return [responses[index] for index in range(len(sub_requests))]
+
+    @staticmethod
+    def _parse_batch_part(payload: bytes, url: str) -> Response:
+        """Превращает HTTP-ответ из части batch-ответа в объект Response"""
+        status_line, _, raw_message = payload.partition(b"\n")
+        message = BytesParser().parsebytes(raw_message)
+
+        response = Response()
+        response.status_code = int(status_line.split()[1])
+        response.reason = status_line.decode().split(maxsplit=2)[-1].strip()
+        response.headers = CaseInsensitiveDict(message.items())
+        response.encoding = "utf-8"
+        response.url = url
+        response._content = cast(bytes, message.get_payload(decode=True)).strip()
+        return response
+
+    def _not_found_response(self, message: str) -> Response:
+        """Ответ 404 в формате ошибок Google Drive для пути, который не найден без отдельного запроса"""
+        response = Response()
+        response.status_code = 404
+        response.reason = "Not Found"
+        response.encoding = "utf-8"
+        response.url = self._resources_url
+        response._content = orjson.dumps({"error": {"code": 404, "message": message}})
+        return response
+
     def download_file(self, remote_path: Path | None, local_path: Path | None) -> Response:
         """Скачивание файла с Google Drive"""
         if not remote_path:
             raise ValueError("Не указан путь к файлу на Google Drive")
 
-        filename = remote_path.name
-        parent_path = remote_path.parent
-        parent_id = self._ensure_path_exists(parent_path)
-
-        query = {
-            "q": f"name='{filename}' and '{parent_id}' in parents and trashed=false",
-            "fields": "files(id)",
-        }
-
-        url = f"{self._base_url}{self._settings.resources_endpoint}"
-        response = requests.get(
-            url, headers=self._headers, params=query
-        )
-        files = response.json().get("files", [])
-
-        if not files:
+        file_id = self._get_file_id(remote_path, folder=False)
+        if not file_id:
             raise FileNotFoundError(f"Файл '{remote_path}' не найден")
 
-        file_id = files[0]["id"]
+        filename = remote_path.name
         download_path = local_path if local_path else Path(filename)
 
         if download_path.parent:
             download_path.parent.mkdir(parents=True, exist_ok=True)
 
-        response = requests.get(
-            f"{url}/{file_id}?alt=media",
-            headers=self._headers,
-            stream=True,
-        )
-
-        with download_path.open("wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
+        response = self._session.get(f"{self._resources_url}/{file_id}", params={"alt": "media"}, stream=True)
+        self._save_stream(response, download_path)
 
         return response
 
     def list_files(self, remote_path: Path | None = None) -> ListFilesResult:
-        """Получение списка файлов в указанной папке"""
-        parent_id = self._ensure_path_exists(remote_path)
+        """
+        Получение списка файлов в указанной папке.
+        Повторный запрос той же папки отправляется с If-None-Match: при ответе 304 возвращается прошлый результат.
+        """
+        parent_id = self._find_folder_id(remote_path)
+        if parent_id is None:
+            return ListFilesResult(response=self._not_found_response(f"Папка '{remote_path}' не найдена"), files=None)
+
         query = {
-            "q": f"'{parent_id}' in parents and trashed=false",
+            "q": QUERY_CHILDREN.format(parent=_quote(parent_id)),
             "fields": "files(id,name,mimeType,size,modifiedTime)",
         }
-        url = f"{self._base_url}{self._settings.resources_endpoint}"
-        response = requests.get(
-            url, headers=self._headers, params=query
-        )
-        return ListFilesResult(response=response, files=response.json().get("files", []))
+        cached = self._etag_cache.get(parent_id)
+        headers = {"If-None-Match": cached[0]} if cached else None
+
+        response = self._session.get(self._resources_url, params=query, headers=headers)
+        if cached and response.status_code == 304:
+            return cached[1]
+
+        result = ListFilesResult(response=response, files=parse_json(response).get("files", []))
+        etag = response.headers.get("ETag")
+        if response.status_code == 200 and etag:
+            self._etag_cache[parent_id] = (etag, result)
+        return result
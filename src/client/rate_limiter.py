@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from requests.adapters import HTTPAdapter
+from requests.models import PreparedRequest, Response
+
+
+class RateLimiter:
+    """Ограничивает число запросов в скользящем окне времени, безопасен для потоков"""
+
+    def __init__(self, max_requests: int, period: float) -> None:
+        self._max_requests = max_requests
+        self._period = period
+        self._timestamps: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Ждет, пока в окне не освободится место, и занимает его"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._timestamps and now - self._timestamps[0] >= self._period:
+                    self._timestamps.popleft()
+
+                if len(self._timestamps) < self._max_requests:
+                    self._timestamps.append(now)
+                    return
+
+                delay = self._period - (now - self._timestamps[0])
+
+            time.sleep(delay)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter, который перед каждым запросом занимает место в RateLimiter"""
+
+    def __init__(self, limiter: RateLimiter, **kwargs: Any) -> None:
+        self._limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request: PreparedRequest, *args: Any, **kwargs: Any) -> Response:
+        """Отправляет запрос, соблюдая ограничение частоты"""
+        self._limiter.acquire()
+        return super().send(request, *args, **kwargs)
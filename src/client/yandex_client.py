@@ -1,12 +1,30 @@
 from __future__ import annotations
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
 
 import requests
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from requests.adapters import HTTPAdapter
 from requests.models import Response
 
-from src.client.cloud import CloudClient, ListFilesResult
+from src.client.cloud import (
+    POOL_MAXSIZE,
+    RETRY_POLICY,
+    UPLOAD_WORKERS,
+    CloudClient,
+    ListFilesResult,
+    is_same_file,
+    parse_json,
+)
+
+LIST_PAGE_SIZE = 1000
+
+# Ссылки на загрузку и скачивание ведут на отдельные хосты и не требуют OAuth-токена
+NO_AUTH = {"Authorization": None}
 
 
 class YandexSettings(BaseSettings):
@@ -20,23 +38,44 @@ class YandexSettings(BaseSettings):
     model_config = SettingsConfigDict(env_file="yandexSettings.env", env_prefix='YANDEX_')
 
 
+@lru_cache(maxsize=1)
+def _get_settings() -> YandexSettings:
+    """Читает настройки один раз на процесс, а не при создании каждого клиента"""
+    return YandexSettings()  # type: ignore
+
+
 class YandexDiskClient(CloudClient):
     """Класс для работы с Яндекс Диском"""
 
-    def __init__(self) -> None:
-        self._settings = YandexSettings()  # type: ignore
+    def __init__(self, max_workers: int = UPLOAD_WORKERS) -> None:
+        self._settings = _get_settings()
+        self._max_workers = max_workers
         self._base_url = self._settings.base_url
+        self._resources_url = f"{self._base_url}{self._settings.resources_endpoint}"
+        self._upload_url = f"{self._base_url}{self._settings.upload_endpoint}"
+        self._download_url = f"{self._base_url}{self._settings.download_endpoint}"
         self._headers = {
             "Authorization": f"OAuth {self._settings.access_token}",
             "Accept": "application/json",
         }
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=10, pool_maxsize=max(max_workers, POOL_MAXSIZE), max_retries=RETRY_POLICY),
+        )
+        self._session.headers.update(self._headers)
+        # Папки, о которых известно, что они уже есть на Диске: повторно их не создаем
+        self._known_dirs: set[str] = set()
 
     def check_disk_access(self) -> Response:
         """Проверка доступности Диска"""
-        return requests.get(self._base_url, headers=self._headers)
+        return self._session.get(self._base_url)
 
     def _ensure_path_exists(self, remote_path: Path | None) -> bool:
-        """Рекурсивно создает путь к файлу/папке, если его не существует"""
+        """
+        Рекурсивно создает путь к файлу/папке, если его не существует.
+        Папки создаются сразу, без предварительной проверки: ответ 409 означает, что папка уже есть.
+        """
         if not remote_path:
             return True
 
@@ -48,26 +87,29 @@ class YandexDiskClient(CloudClient):
                 continue
 
             current_path = f"{current_path}/{part}" if current_path else part
-            if not self._path_exists(Path(current_path)):
-                url = f"{self._base_url}{self._settings.resources_endpoint}?path={current_path}"
-                response = requests.put(
-                    url,
-                    headers=self._headers,
+            if current_path in self._known_dirs:
+                continue
+
+            response = self._session.put(self._resources_url, params={"path": current_path})
+            if response.status_code not in (200, 201, 409):
+                raise Exception(
+                    f"Ошибка при создании папки {current_path}: {response.status_code} - {response.text}"
                 )
-                if response.status_code not in (200, 201):
-                    raise Exception(
-                        f"Ошибка при создании папки {current_path}: {response.status_code} - {response.text}"
-                    )
+            self._known_dirs.add(current_path)
 
         return True
 
+    def _forget_dir(self, remote_path: Path) -> None:
+        """Удаляет из кэша папку и все вложенные в нее папки (например, после ее удаления)"""
+        prefix = remote_path.as_posix().strip("/")
+        self._known_dirs = {path for path in self._known_dirs if path != prefix and not path.startswith(f"{prefix}/")}
+
     def _path_exists(self, path: Path | None) -> bool:
         """Проверяет, существует ли путь на Яндекс Диске"""
         if not path:
             return False
 
-        url = f"{self._base_url}{self._settings.resources_endpoint}?path={path}"
-        response = requests.get(url, headers=self._headers)
+        response = self._session.get(self._resources_url, params={"path": str(path)})
         return response.status_code == 200
 
     def upload_file(self, local_path: Path | None, remote_path: Path | None) -> Response:
@@ -80,50 +122,127 @@ class YandexDiskClient(CloudClient):
         remote_path_obj = Path(remote_path) if remote_path else Path(local_path.name)
         parent_path = remote_path_obj.parent if remote_path else None
         self._ensure_path_exists(parent_path)
+        response = self._upload_file_to_path(local_path, remote_path_obj)
 
-        url = f"{self._base_url}{self._settings.upload_endpoint}?path={remote_path_obj}&overwrite=true"
-        response = requests.get(
-            url,
-            headers=self._headers,
-        )
+        if response.status_code == 409 and parent_path:
+            # Папка из кэша была удалена вне клиента: создаем путь заново и повторяем загрузку
+            for cached_path in (parent_path, *parent_path.parents):
+                self._forget_dir(cached_path)
+            self._ensure_path_exists(parent_path)
+            response = self._upload_file_to_path(local_path, remote_path_obj)
+
+        return response
+
+    def _upload_file_to_path(self, local_path: Path, remote_path: Path | str) -> Response:
+        """Загружает файл по удаленному пути, родительская папка которого уже существует"""
+        response = self._session.get(self._upload_url, params={"path": str(remote_path), "overwrite": "true"})
 
         if response.status_code != 200:
             return response
 
-        upload_url = response.json().get("href")
+        upload_url = parse_json(response).get("href")
         if not upload_url:
             raise Exception("Не удалось получить URL для загрузки")
 
         with local_path.open("rb") as f:
-            response = requests.put(upload_url, files={"file": f})
+            response = self._session.put(upload_url, data=f, headers=NO_AUTH)
 
         return response
 
     def upload_folder(self, local_folder: Path | None, remote_folder: Path | None) -> list[Response]:
-        """Рекурсивная загрузка папки с содержимым"""
+        """
+        Рекурсивная загрузка папки с содержимым.
+
+        Папки создаются по уровням вложенности (папки одного уровня параллельно), затем файлы загружаются параллельно.
+        Уже существующие папки переиспользуются, а файлы с тем же размером и MD5 повторно не загружаются.
+        """
         if not local_folder:
             raise ValueError("Локальная папка не может быть None")
         if not local_folder.is_dir():
             raise NotADirectoryError(f"Локальная папка не найдена: {local_folder}")
 
         responses = []
+        uploads: list[tuple[Path, str]] = []
         self._ensure_path_exists(remote_folder)
 
-        for item in local_folder.rglob("*"):
-            relative_path = item.relative_to(local_folder)
-            remote_item_path = Path(remote_folder) / relative_path if remote_folder else relative_path
+        # Обход по уровням через os.scandir: тип записи берется из результата чтения каталога без лишних stat.
+        # Удаленный путь собирается из префикса родителя и имени записи, без relative_to и склейки Path
+        root_key = "/".join(p for p in remote_folder.parts if p not in ('/', '.')) if remote_folder else ""
+        root_prefix = f"{root_key}/" if root_key else ""
+        # (локальный путь, удаленный префикс, могла ли папка существовать раньше)
+        folder_level: list[tuple[str, str, bool]] = [(str(local_folder), root_prefix, True)]
+        while folder_level:
+            subfolders: list[tuple[str, str]] = []
+            next_level: list[tuple[str, str, bool]] = []
+
+            for current_local, current_prefix, may_exist in folder_level:
+                # Только что созданные папки пусты, листинг нужен лишь для уже существовавших
+                existing = self._list_dir(current_prefix.rstrip("/") or "/") if may_exist else {}
+
+                with os.scandir(current_local) as entries:
+                    for entry in entries:
+                        remote_item_path = current_prefix + entry.name
+                        remote_item = existing.get(entry.name)
+                        is_remote_dir = remote_item is not None and remote_item["type"] == "dir"
+
+                        if entry.is_dir():
+                            if is_remote_dir:
+                                self._known_dirs.add(remote_item_path)
+                                next_level.append((entry.path, f"{remote_item_path}/", True))
+                            else:
+                                subfolders.append((entry.path, remote_item_path))
+                        elif (
+                            remote_item is None
+                            or is_remote_dir
+                            or not is_same_file(entry, remote_item.get("size"), remote_item.get("md5"))
+                        ):
+                            uploads.append((Path(entry.path), remote_item_path))
+
+            dir_responses = self._create_dirs([remote_path for _, remote_path in subfolders])
+            responses.extend(dir_responses)
+            next_level.extend(
+                (local_path, f"{remote_path}/", response.status_code != 201)
+                for (local_path, remote_path), response in zip(subfolders, dir_responses)
+            )
+            folder_level = next_level
 
-            if item.is_dir():
-                url = f"{self._base_url}{self._settings.resources_endpoint}?path={remote_item_path}"
-                response = requests.put(
-                    url,
-                    headers=self._headers,
-                )
-                responses.append(response)
-            else:
-                response = self.upload_file(item, remote_item_path)
-                responses.append(response)
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            responses.extend(executor.map(lambda args: self._upload_file_to_path(*args), uploads))
+
+        return responses
+
+    def _list_dir(self, remote_path: str) -> dict[str, dict[str, Any]]:
+        """Возвращает содержимое папки на Диске в виде {имя: ресурс}, для отсутствующей папки - пустой словарь"""
+        items: dict[str, dict[str, Any]] = {}
+        offset = 0
+
+        while True:
+            params: dict[str, str | int] = {"path": remote_path, "limit": LIST_PAGE_SIZE, "offset": offset}
+            response = self._session.get(self._resources_url, params=params)
+            if response.status_code == 404:
+                return items
+            response.raise_for_status()
+
+            page = parse_json(response).get("_embedded", {})
+            items.update((item["name"], item) for item in page.get("items", []))
+
+            offset += LIST_PAGE_SIZE
+            if offset >= page.get("total", 0):
+                return items
+
+    def _create_dirs(self, remote_paths: list[str]) -> list[Response]:
+        """Параллельно создает папки одного уровня вложенности, их родители уже должны существовать"""
+        if not remote_paths:
+            return []
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            responses = list(
+                executor.map(lambda path: self._session.put(self._resources_url, params={"path": path}), remote_paths)
+            )
 
+        for remote_path, response in zip(remote_paths, responses):
+            if response.status_code in (201, 409):
+                self._known_dirs.add(remote_path)
         return responses
 
     def download_file(self, remote_path: Path | None, local_path: Path | None) -> Response:
@@ -132,21 +251,18 @@ class YandexDiskClient(CloudClient):
             if not remote_path:
                 raise ValueError("Не указан путь к файлу на Яндекс Диске")
 
-            url = f"{self._base_url}{self._settings.download_endpoint}?path={remote_path}"
-            response = requests.get(
-                url,
-                headers=self._headers,
-            )
+            response = self._session.get(self._download_url, params={"path": str(remote_path)})
+            data = parse_json(response)
 
             if response.status_code != 200:
-                error_msg = response.json().get("message", "Ошибка")
+                error_msg = data.get("message", "Ошибка")
                 raise Exception(f"Яндекс.Диск вернул ошибку: {error_msg} (код {response.status_code})")
 
-            download_url = response.json().get("href")
+            download_url = data.get("href")
             if not download_url:
                 raise Exception("Не удалось получить URL для скачивания")
 
-            file_response = requests.get(download_url, stream=True)
+            file_response = self._session.get(download_url, stream=True, headers=NO_AUTH)
             if file_response.status_code != 200:
                 raise Exception(f"Ошибка при загрузке файла: {file_response.status_code}")
 
@@ -154,10 +270,7 @@ class YandexDiskClient(CloudClient):
             if download_path.parent:
                 download_path.parent.mkdir(parents=True, exist_ok=True)
 
-            with download_path.open("wb") as f:
-                for chunk in file_response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            self._save_stream(file_response, download_path)
 
             print(f"Файл успешно скачан: {remote_path} -> {download_path}")
             return file_response
@@ -170,16 +283,12 @@ class YandexDiskClient(CloudClient):
         """Получение списка файлов на Диске"""
         try:
             path_to_list = str(remote_path) if remote_path else ""
-            url = f"{self._base_url}{self._settings.resources_endpoint}?path={path_to_list}&limit=1000"
-            response = requests.get(
-                url,
-                headers=self._headers,
-            )
+            response = self._session.get(self._resources_url, params={"path": path_to_list, "limit": "1000"})
 
             if response.status_code != 200:
                 return ListFilesResult(response=response, files=None)
 
-            items = response.json().get("_embedded", {}).get("items", [])
+            items = parse_json(response).get("_embedded", {}).get("items", [])
             return ListFilesResult(response=response, files=items)
         except Exception as e:
             print(f"Ошибка при получении списка файлов: {str(e)}")
@@ -1,32 +1,37 @@
 import argparse
+import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional
 
-from src.client.google_drive_client import GoogleDriveClient
-from src.client.yandex_client import YandexDiskClient
+from src.client.cloud import CloudClient
 
 
-def get_client(service: str) -> Union[YandexDiskClient, GoogleDriveClient]:
-    """Возвращает клиент для выбранного облака"""
+def get_client(service: str) -> CloudClient:
+    """Возвращает клиент для выбранного облака, модуль клиента импортируется только при выборе сервиса"""
     if service == "yandex":
+        from src.client.yandex_client import YandexDiskClient
+
         return YandexDiskClient()
     elif service == "google":
+        from src.client.google_drive_client import GoogleDriveClient
+
         return GoogleDriveClient()
     else:
         raise ValueError("Неподдерживаемый сервис. Доступно: yandex, google")
 
 
 def print_file_list(items: List[Dict[str, Any]], service: str) -> None:
-    """Выводит список файлов в удобном формате"""
+    """Выводит список файлов в удобном формате, весь список пишется одним вызовом"""
     if service == "yandex":
-        for item in items:
-            item_type = "папка" if item.get("type") == "dir" else "файл"
-            print(f"{item_type:<5} {item.get('name')}" f" ({item.get('size', 'N/A')} bytes)")
+        type_key, folder_type = "type", "dir"
     else:
-        mime = "application/vnd.google-apps.folder"
-        for item in items:
-            item_type = "папка" if item.get("mimeType") == mime else "файл"
-            print(f"{item_type:<5} {item.get('name')}" f" ({item.get('size', 'N/A')} bytes)")
+        type_key, folder_type = "mimeType", "application/vnd.google-apps.folder"
+
+    sys.stdout.writelines(
+        f"{'папка' if item.get(type_key) == folder_type else 'файл':<5} {item.get('name')}"
+        f" ({item.get('size', 'N/A')} bytes)\n"
+        for item in items
+    )
 
 
 def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
@@ -80,63 +85,63 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
 def main() -> None:
     try:
         args = parse_args()
-        client = get_client(args.service)
-        access_response = client.check_disk_access()
-
-        if access_response.status_code != 200:
-            print(f"Ошибка доступа к {args.service.capitalize()}: {access_response.status_code}")
-            print(access_response.text)
-            return
-
-        if args.command == "upload":
-            source = Path(args.source).expanduser().resolve()
-            destination = Path(args.destination.strip("\"'"))
-
-            if not source.exists():
-                raise FileNotFoundError(f"Локальный путь не существует: {source}")
-
-            upload_type = args.type.lower() if args.type else "folder" if source.is_dir() else "file"
-
-            if upload_type == "folder":
-                print(f"Загрузка папки '{source}' в '{destination}'...")
-                responses = client.upload_folder(source, destination)
-                print(f"Успешно загружено {len(responses)} элементов")
-            else:
-                print(f"Загрузка файла '{source}' в '{destination}'...")
-                response = client.upload_file(source, destination)
-                if response.status_code in (200, 201):
-                    print("Файл успешно загружен!")
+        with get_client(args.service) as client:
+            access_response = client.check_disk_access()
+
+            if access_response.status_code != 200:
+                print(f"Ошибка доступа к {args.service.capitalize()}: {access_response.status_code}")
+                print(access_response.text)
+                return
+
+            if args.command == "upload":
+                source = Path(args.source).expanduser().resolve()
+                destination = Path(args.destination.strip("\"'"))
+
+                if not source.exists():
+                    raise FileNotFoundError(f"Локальный путь не существует: {source}")
+
+                upload_type = args.type.lower() if args.type else "folder" if source.is_dir() else "file"
+
+                if upload_type == "folder":
+                    print(f"Загрузка папки '{source}' в '{destination}'...")
+                    responses = client.upload_folder(source, destination)
+                    print(f"Успешно загружено {len(responses)} элементов")
                 else:
-                    print(f"Ошибка загрузки: {response.status_code}")
+                    print(f"Загрузка файла '{source}' в '{destination}'...")
+                    response = client.upload_file(source, destination)
+                    if response.status_code in (200, 201):
+                        print("Файл успешно загружен!")
+                    else:
+                        print(f"Ошибка загрузки: {response.status_code}")
+                        print(response.text)
+
+            elif args.command == "download":
+                source = Path(args.source.strip("\"'"))
+                destination = Path(args.destination).expanduser().resolve()
+
+                print(f"Скачивание '{source}' в '{destination}'...")
+
+                destination.parent.mkdir(parents=True, exist_ok=True)
+
+                response = client.download_file(source, destination)
+                if response.status_code == 200:
+                    print("Файл успешно скачан!")
+                else:
+                    print(f"Ошибка скачивания: {response.status_code}")
                     print(response.text)
 
-        elif args.command == "download":
-            source = Path(args.source.strip("\"'"))
-            destination = Path(args.destination).expanduser().resolve()
-
-            print(f"Скачивание '{source}' в '{destination}'...")
-
-            destination.parent.mkdir(parents=True, exist_ok=True)
-
-            response = client.download_file(source, destination)
-            if response.status_code == 200:
-                print("Файл успешно скачан!")
-            else:
-                print(f"Ошибка скачивания: {response.status_code}")
-                print(response.text)
-
-        elif args.command == "list":
-            path = Path(args.path.strip("\"'")) if args.path else Path("/")
-            print(f"Содержимое '{path}' на {args.service.capitalize()}:")
-
-            response, items = client.list_files(path)
-            if response.status_code != 200:
-                print(f"Ошибка получения списка файлов: {response.status_code}")
-                print(response.text)
-            elif not items:
-                print("Папка пуста")
-            else:
-                print_file_list(items, args.service)
+            elif args.command == "list":
+                path = Path(args.path.strip("\"'")) if args.path else Path("/")
+                print(f"Содержимое '{path}' на {args.service.capitalize()}:")
+
+                response, items = client.list_files(path)
+                if response.status_code != 200:
+                    print(f"Ошибка получения списка файлов: {response.status_code}")
+                    print(response.text)
+                elif not items:
+                    print("Папка пуста")
+                else:
+                    print_file_list(items, args.service)
 
     except Exception as e:
         print(f"Произошла ошибка: {str(e)}")
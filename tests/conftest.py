@@ -0,0 +1,19 @@
+from typing import Callable
+
+import pytest
+
+from src.client.cloud import CloudClient
+
+
+@pytest.fixture(scope="session")
+def disk_available() -> Callable[[CloudClient], bool]:
+    """Проверяет доступ к облаку один раз за сессию для каждого типа клиента, результат кэшируется"""
+    results: dict[type[CloudClient], bool] = {}
+
+    def check(client: CloudClient) -> bool:
+        client_type = type(client)
+        if client_type not in results:
+            results[client_type] = client.check_disk_access().status_code == 200
+        return results[client_type]
+
+    return check
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import orjson
+import pytest
+
+from src.client import folder_cache
+from src.client.folder_cache import FolderCache
+
+
+def test_load_skips_expired_entries(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = [1000.0]
+    monkeypatch.setattr(folder_cache.time, "time", lambda: clock[0])
+    cache = FolderCache(tmp_path / "folders.json", "user_1", ttl=60)
+
+    cache.update({"old": "id_old"})
+    clock[0] += 30
+    cache.update({"new": "id_new"})
+    assert cache.load() == {"old": "id_old", "new": "id_new"}
+
+    clock[0] += 40
+    assert cache.load() == {"new": "id_new"}
+
+
+def test_discard_removes_folder_and_subtree(tmp_path: Path) -> None:
+    cache = FolderCache(tmp_path / "folders.json", "user_1")
+    cache.update({"a": "id_a", "a/b": "id_b", "a/b/c": "id_c", "ab": "id_ab"})
+
+    cache.discard("a/b")
+    assert cache.load() == {"a": "id_a", "ab": "id_ab"}
+
+    cache.discard("a")
+    assert cache.load() == {"ab": "id_ab"}
+
+
+def test_update_prunes_expired_and_foreign_entries(tmp_path: Path) -> None:
+    cache_file = tmp_path / "folders.json"
+    cache_file.write_bytes(
+        orjson.dumps(
+            {
+                "user_1": {"old": ["id_old", 0], "kept": ["id_kept", 9e18]},
+                "user_2": {"other": ["id_other", 9e18]},
+            }
+        )
+    )
+
+    FolderCache(cache_file, "user_1").update({"new": "id_new"})
+
+    stored = orjson.loads(cache_file.read_bytes())
+    assert list(stored) == ["user_1"]
+    assert set(stored["user_1"]) == {"kept", "new"}
@@ -1,74 +1,92 @@
+import asyncio
+import logging
+import os
 import time
 from pathlib import Path
-from tempfile import NamedTemporaryFile, TemporaryDirectory
-from typing import Generator
+from typing import Callable, Generator
 
 import pytest
-import requests
+from requests.models import Response
 
-from src.client.google_drive_client import GoogleDriveClient
+from src.client.cloud import CloudClient
+from src.client.google_drive_client import GoogleDriveClient, _get_settings
 
+logger = logging.getLogger(__name__)
 
-@pytest.fixture(scope="module")
-def client() -> Generator[GoogleDriveClient, None, None]:
-    client = GoogleDriveClient()
 
-    if client.check_disk_access().status_code != 200:
-        pytest.skip("Google Drive недоступен (проверьте токен и подключение)")
+def wait_until(condition: Callable[[], bool], timeout: float = 1.0, interval: float = 0.05) -> bool:
+    """Опрашивает условие, пока оно не выполнится или не истечет timeout секунд"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+    return True
 
-    yield client
 
+@pytest.fixture(scope="module")
+def client(
+    disk_available: Callable[[CloudClient], bool], tmp_path_factory: pytest.TempPathFactory
+) -> Generator[GoogleDriveClient, None, None]:
+    # Кэш ID папок пишется во временный файл, а не в ~/.cache пользователя
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("GOOGLE_FOLDER_CACHE_FILE", str(tmp_path_factory.mktemp("cache") / "folders.json"))
+        _get_settings.cache_clear()
+        with GoogleDriveClient() as client:
+            if not disk_available(client):
+                pytest.skip("Google Drive недоступен (проверьте токен и подключение)")
 
-@pytest.fixture
-def test_file() -> Generator[Path, None, None]:
-    with NamedTemporaryFile(mode='w', delete=False, suffix='.txt') as f:
-        f.write("Test file content")
-        file_path = Path(f.name)
+            yield client
 
-    yield file_path
-    file_path.unlink(missing_ok=True)
+    _get_settings.cache_clear()
 
 
-@pytest.fixture
-def test_folder() -> Generator[Path, None, None]:
-    with TemporaryDirectory() as temp_dir:
-        dir_path = Path(temp_dir)
-        for i in range(3):
-            (dir_path / f"file_{i}.txt").write_text(f"Content {i}")
-        yield dir_path
+@pytest.fixture(scope="module")
+def test_file(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    file_path = tmp_path_factory.mktemp("upload") / "test_file.txt"
+    file_path.write_bytes(b"Test file content")
+    # Файл общий для всех тестов модуля, поэтому защищен от изменения
+    file_path.chmod(0o444)
+    return file_path
 
 
-@pytest.fixture
-def remote_test_folder(client: GoogleDriveClient) -> Generator[str, None, None]:
-    folder_name = "pytest_test_folder"
-    folder_id = client._ensure_path_exists(Path(folder_name))
+@pytest.fixture(scope="module")
+def test_folder(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    dir_path = tmp_path_factory.mktemp("test_folder")
+    for i in range(3):
+        file_path = dir_path / f"file_{i}.txt"
+        file_path.write_bytes(f"Content {i}".encode())
+        file_path.chmod(0o444)
+    return dir_path
+
+
+@pytest.fixture(scope="module")
+def remote_test_folder(client: GoogleDriveClient) -> Generator[Path, None, None]:
+    # При запуске через pytest-xdist у каждого воркера своя папка
+    remote_path = Path(f"pytest_test_folder{os.environ.get('PYTEST_XDIST_WORKER', '')}")
+    folder_id = client._ensure_path_exists(remote_path)
 
-    yield folder_name
+    yield remote_path
 
     try:
-        requests.delete(
-            f"{client._settings.base_url}/files/{folder_id}",
-            headers={"Authorization": f"Bearer {client._settings.access_token}"},
-        )
+        client._session.delete(f"{client._resources_url}/{folder_id}")
+        client._forget_folder(remote_path)
     except Exception as e:
-        print(f"Ошибка очистки тестовой папки: {e}")
+        logger.warning("Ошибка очистки тестовой папки: %s", e)
 
 
-def test_upload_file(client: GoogleDriveClient, test_file: Path, remote_test_folder: str) -> None:
-    remote_path = Path(f"{remote_test_folder}/test_file.txt")
+def test_upload_file(client: GoogleDriveClient, test_file: Path, remote_test_folder: Path) -> None:
+    remote_path = remote_test_folder / "test_file.txt"
 
     response = client.upload_file(test_file, remote_path)
     assert response.status_code == 200
-
-    result = client.list_files(Path(remote_test_folder))
-    assert result.files is not None
-    assert any(item["name"] == "test_file.txt" for item in result.files)
+    assert response.json().get("name") == remote_path.name
 
 
-def test_upload_folder(client: GoogleDriveClient, test_folder: Path, remote_test_folder: str) -> None:
-    remote_path = Path(f"{remote_test_folder}/test_folder")
+def test_upload_folder(client: GoogleDriveClient, test_folder: Path, remote_test_folder: Path) -> None:
+    remote_path = remote_test_folder / "test_folder"
 
-    responses = client.upload_folder(test_folder, remote_path)
+    responses = asyncio.run(client.upload_folder_async(test_folder, remote_path))
     assert all(r.status_code == 200 for r in responses)
 
     result = client.list_files(remote_path)
@@ -76,36 +94,40 @@ def test_upload_folder(client: GoogleDriveClient, test_folder: Path, remote_test
     assert len(result.files) == 3
 
 
-def test_download_file(client: GoogleDriveClient, test_file: Path, remote_test_folder: str) -> None:
-    remote_path = Path(f"{remote_test_folder}/download_test.txt")
+def test_download_file(client: GoogleDriveClient, test_file: Path, remote_test_folder: Path, tmp_path: Path) -> None:
+    remote_path = remote_test_folder / "download_test.txt"
     client.upload_file(test_file, remote_path)
-    time.sleep(1)
+    assert wait_until(lambda: client._path_exists(remote_path))
 
-    with NamedTemporaryFile(delete=False) as tmp_file:
-        local_path = Path(tmp_file.name)
+    local_path = tmp_path / "download_test.txt"
+    response = client.download_file(remote_path, local_path)
+    assert response.status_code == 200
+    assert local_path.read_text() == "Test file content"
 
-    try:
-        response = client.download_file(remote_path, local_path)
-        assert response.status_code == 200
-        assert local_path.read_text() == "Test file content"
-    finally:
-        local_path.unlink(missing_ok=True)
 
+def test_list_files(client: GoogleDriveClient, test_file: Path, remote_test_folder: Path) -> None:
+    test_files = [remote_test_folder / f"list_file_{i}.txt" for i in range(2)]
+
+    async def upload_all() -> list[Response]:
+        return await asyncio.gather(*(client.upload_file_async(test_file, file) for file in test_files))
+
+    asyncio.run(upload_all())
+
+    def all_listed() -> bool:
+        files = client.list_files(remote_test_folder).files or []
+        return {file.name for file in test_files} <= {item["name"] for item in files}
 
-def test_list_files(client: GoogleDriveClient, test_file: Path, remote_test_folder: str) -> None:
-    test_files = [Path(f"{remote_test_folder}/list_file_{i}.txt") for i in range(2)]
-    for file in test_files:
-        client.upload_file(test_file, file)
-    time.sleep(1)
+    assert wait_until(all_listed)
 
-    result = client.list_files(Path(remote_test_folder))
+    result = client.list_files(remote_test_folder)
     assert result.files is not None
     assert len(result.files) >= 2
-    assert all(f"list_file_{i}.txt" in [f["name"] for f in result.files] for i in range(2))
+    names = {f["name"] for f in result.files}
+    assert all(f"list_file_{i}.txt" in names for i in range(2))
 
 
-def test_path_operations(client: GoogleDriveClient, remote_test_folder: str) -> None:
-    test_path = Path(f"{remote_test_folder}/test/sub/folder")
+def test_path_operations(client: GoogleDriveClient, remote_test_folder: Path) -> None:
+    test_path = remote_test_folder / "test/sub/folder"
 
     assert not client._path_exists(test_path)
     assert client._ensure_path_exists(test_path)
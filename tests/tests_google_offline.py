@@ -0,0 +1,238 @@
+import io
+from pathlib import Path
+from typing import Any, Callable, Generator
+from unittest.mock import MagicMock
+
+import orjson
+import pytest
+import requests
+from requests.models import Response
+
+from src.client import google_drive_client
+from src.client.google_drive_client import GoogleDriveClient, _get_settings
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
+
+def make_response(
+    status_code: int, payload: Any = None, headers: dict[str, str] | None = None, content: bytes = b""
+) -> Response:
+    """Собирает ответ Google Drive без обращения к сети"""
+    response = Response()
+    response.status_code = status_code
+    response._content = orjson.dumps(payload) if payload is not None else content
+    response.raw = io.BytesIO(response._content)
+    response.headers.update(headers or {})
+    response.encoding = "utf-8"
+    return response
+
+
+def drive_get(folders: list[dict[str, Any]]) -> Callable[..., Response]:
+    """Обработчик GET-запросов: аккаунт, настоящий ID корня и листинг с указанными папками"""
+
+    def get(url: str, **kwargs: Any) -> Response:
+        if url.endswith("/about"):
+            return make_response(200, {"user": {"permissionId": "user_1"}})
+        if url.endswith("/files/root"):
+            return make_response(200, {"id": "0AReal"})
+        return make_response(200, {"files": folders})
+
+    return get
+
+
+@pytest.fixture
+def session() -> MagicMock:
+    return MagicMock()
+
+
+@pytest.fixture
+def offline_client(
+    session: MagicMock, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> Generator[GoogleDriveClient, None, None]:
+    settings = {
+        "ACCESS_TOKEN": "token",
+        "BASE_URL": "https://www.googleapis.com/drive/v3",
+        "UPLOAD_URL": "https://www.googleapis.com/upload/drive/v3/files",
+        "RESOURCES_ENDPOINT": "/files",
+        "MIME_TYPE": FOLDER_MIME_TYPE,
+        "FOLDER_CACHE_FILE": str(tmp_path / "folders.json"),
+    }
+    for name, value in settings.items():
+        monkeypatch.setenv(f"GOOGLE_{name}", value)
+    _get_settings.cache_clear()
+
+    client = GoogleDriveClient()
+    client._session = session
+    yield client
+
+    _get_settings.cache_clear()
+
+
+def test_resolve_folder_with_real_root_id(offline_client: GoogleDriveClient, session: MagicMock) -> None:
+    """В parents Drive возвращает настоящий ID корня, а не псевдоним root"""
+    session.get.side_effect = drive_get(
+        [
+            {"id": "id_a", "name": "a", "parents": ["0AReal"]},
+            {"id": "id_b", "name": "b", "parents": ["id_a"]},
+        ]
+    )
+
+    assert offline_client._find_folder_id(Path("a/b")) == "id_b"
+    assert offline_client._ensure_path_exists(Path("a/b")) == "id_b"
+    session.post.assert_not_called()
+
+
+def test_list_files_missing_folder(offline_client: GoogleDriveClient, session: MagicMock) -> None:
+    """Для несуществующей папки возвращается ответ 404 и files=None, как у Яндекс Диска"""
+    session.get.side_effect = drive_get([])
+
+    result = offline_client.list_files(Path("missing"))
+    assert result.response.status_code == 404
+    assert result.files is None
+
+
+def test_folder_cache_survives_token_refresh(
+    offline_client: GoogleDriveClient, session: MagicMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Кэш на диске привязан к аккаунту, а не к токену, который обновляется каждый час"""
+    session.get.side_effect = drive_get([{"id": "id_a", "name": "a", "parents": ["0AReal"]}])
+    assert offline_client._find_folder_id(Path("a")) == "id_a"
+
+    monkeypatch.setenv("GOOGLE_ACCESS_TOKEN", "refreshed_token")
+    _get_settings.cache_clear()
+    refreshed_session = MagicMock()
+    refreshed_session.get.side_effect = drive_get([])
+    refreshed = GoogleDriveClient()
+    refreshed._session = refreshed_session
+
+    assert refreshed._find_folder_id(Path("a")) == "id_a"
+
+
+def test_upload_file_recreates_deleted_ancestors(
+    offline_client: GoogleDriveClient, session: MagicMock, tmp_path: Path
+) -> None:
+    """После 404 сбрасываются ID всех папок пути, а не только родительской"""
+    session.get.side_effect = drive_get([])
+    offline_client._get_folder_store()
+    offline_client._folder_id_cache.update({"": "0AReal", "a": "deleted_a", "a/b": "deleted_b"})
+    created_ids = iter(["id_a", "id_b"])
+    upload_responses = iter([make_response(404, {"error": {"code": 404}}), make_response(200, {"id": "file_id"})])
+
+    session.post.side_effect = lambda url, **kwargs: make_response(200, {"id": next(created_ids)})
+    session.request.side_effect = lambda method, url, **kwargs: next(upload_responses)
+    local_file = tmp_path / "file.txt"
+    local_file.write_bytes(b"content")
+
+    response = offline_client.upload_file(local_file, Path("a/b/file.txt"))
+    assert response.status_code == 200
+    assert offline_client._folder_id_cache["a"] == "id_a"
+    assert offline_client._folder_id_cache["a/b"] == "id_b"
+
+
+def test_create_folder_error_is_raised(offline_client: GoogleDriveClient, session: MagicMock) -> None:
+    session.get.side_effect = drive_get([])
+    session.post.return_value = make_response(404, {"error": {"code": 404}})
+
+    with pytest.raises(requests.HTTPError):
+        offline_client._ensure_path_exists(Path("a"))
+
+
+def test_upload_folder_updates_changed_file_in_place(
+    offline_client: GoogleDriveClient, session: MagicMock, tmp_path: Path
+) -> None:
+    """Измененный файл обновляется PATCH-запросом по его ID, а не загружается вторым файлом"""
+    remote_file = {"id": "file_id", "name": "file.txt", "mimeType": "text/plain", "size": "3", "md5Checksum": "old"}
+    session.get.side_effect = drive_get([{"id": "dst_id", "name": "dst", "parents": ["0AReal"]}, remote_file])
+    session.request.return_value = make_response(200, {"id": "file_id"})
+    local_folder = tmp_path / "src"
+    local_folder.mkdir()
+    (local_folder / "file.txt").write_bytes(b"new")
+
+    offline_client.upload_folder(local_folder, Path("dst"))
+
+    method, url = session.request.call_args.args
+    assert method == "PATCH"
+    assert url == f"{offline_client._upload_url}/file_id?uploadType=multipart"
+
+
+def test_download_file_skips_folder_with_same_name(
+    offline_client: GoogleDriveClient, session: MagicMock, tmp_path: Path
+) -> None:
+    """При скачивании ищется только файл, даже если рядом есть одноименная папка"""
+    session.get.side_effect = drive_get([{"id": "file_id", "name": "report"}])
+
+    offline_client.download_file(Path("report"), tmp_path / "report")
+
+    lookup = next(c for c in session.get.call_args_list if "q" in c.kwargs.get("params", {}))
+    assert f"mimeType!='{FOLDER_MIME_TYPE}'" in lookup.kwargs["params"]["q"]
+    assert session.get.call_args.args[0] == f"{offline_client._resources_url}/file_id"
+
+
+def test_batch_request_parses_parts_in_request_order(offline_client: GoogleDriveClient, session: MagicMock) -> None:
+    """Части batch-ответа сопоставляются с запросами по Content-ID, даже если пришли в другом порядке"""
+    boundary = "batch_response"
+
+    def part(index: int, status_line: str, body: str) -> str:
+        return (
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <response-item{index}>\r\n\r\n"
+            f"{status_line}\r\n"
+            "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+            f"{body}\r\n"
+        )
+
+    content = part(1, "HTTP/1.1 404 Not Found", '{"error": {"code": 404}}') + part(
+        0, "HTTP/1.1 200 OK", '{"id": "folder_0"}'
+    )
+    session.post.return_value = make_response(
+        200,
+        headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+        content=f"{content}--{boundary}--\r\n".encode(),
+    )
+    sub_requests = [{"method": "POST", "path": "/drive/v3/files", "body": {"name": f"folder_{i}"}} for i in range(2)]
+
+    first, second = offline_client._batch_request(sub_requests)
+
+    assert (first.status_code, first.json()) == (200, {"id": "folder_0"})
+    assert (second.status_code, second.reason) == (404, "Not Found")
+    body = session.post.call_args.kwargs["data"]
+    assert b"Content-ID: <item0>" in body and b"Content-ID: <item1>" in body
+
+
+def test_upload_resumable_continues_from_range(
+    offline_client: GoogleDriveClient, session: MagicMock, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """После обрыва загрузка продолжается с байта, следующего за Range из ответа 308"""
+    monkeypatch.setattr(google_drive_client, "RESUMABLE_CHUNK_SIZE", 4)
+    monkeypatch.setattr(google_drive_client.time, "sleep", lambda seconds: None)
+    local_file = tmp_path / "big.bin"
+    local_file.write_bytes(b"0123456789")
+
+    session.request.return_value = make_response(200, headers={"Location": "https://upload.example/session"})
+    replies: list[Response | Exception] = [
+        make_response(308, headers={"Range": "bytes=0-3"}),
+        requests.ConnectionError(),
+        make_response(308, headers={"Range": "bytes=0-5"}),
+        make_response(200, {"id": "file_id"}),
+    ]
+    sent: list[tuple[str, bytes]] = []
+
+    def put(url: str, data: Any = None, headers: dict[str, str] | None = None) -> Response:
+        sent.append(((headers or {})["Content-Range"], bytes(data) if data is not None else b""))
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    session.put.side_effect = put
+
+    response = offline_client._upload_resumable(local_file, {"name": "big.bin"}, "POST", offline_client._upload_url)
+
+    assert response.status_code == 200
+    assert sent == [
+        ("bytes 0-3/10", b"0123"),
+        ("bytes 4-7/10", b"4567"),
+        ("bytes */10", b""),
+        ("bytes 6-9/10", b"6789"),
+    ]
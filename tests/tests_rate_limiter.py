@@ -0,0 +1,30 @@
+import pytest
+
+from src.client import rate_limiter
+from src.client.rate_limiter import RateLimiter
+
+
+def test_acquire_waits_for_window(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Запрос сверх лимита ждет, пока самый старый запрос не выйдет из окна"""
+    clock = [100.0]
+    sleeps: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(rate_limiter.time, "sleep", sleep)
+    limiter = RateLimiter(max_requests=2, period=10)
+
+    limiter.acquire()
+    clock[0] += 4
+    limiter.acquire()
+    assert sleeps == []
+
+    limiter.acquire()
+    assert sleeps == [6]
+
+    clock[0] += 4
+    limiter.acquire()
+    assert sleeps == [6]
@@ -1,54 +1,60 @@
+import asyncio
+import logging
+import os
 from pathlib import Path
-from tempfile import NamedTemporaryFile, TemporaryDirectory
-from typing import Generator
+from typing import Callable, Generator
 
 import pytest
-import requests
+from requests.models import Response
 
+from src.client.cloud import CloudClient
 from src.client.yandex_client import YandexDiskClient
 
+logger = logging.getLogger(__name__)
 
-@pytest.fixture(scope="module")
-def client() -> Generator[YandexDiskClient, None, None]:
-    client = YandexDiskClient()
-
-    if client.check_disk_access().status_code != 200:
-        pytest.skip("Яндекс.Диск недоступен (проверьте токен и подключение)")
 
-    yield client
+@pytest.fixture(scope="module")
+def client(disk_available: Callable[[CloudClient], bool]) -> Generator[YandexDiskClient, None, None]:
+    with YandexDiskClient() as client:
+        if not disk_available(client):
+            pytest.skip("Яндекс.Диск недоступен (проверьте токен и подключение)")
 
+        yield client
 
-@pytest.fixture
-def test_file() -> Generator[Path, None, None]:
-    with NamedTemporaryFile(mode='w', delete=False, suffix='.txt') as f:
-        f.write("Test file content")
-        file_path = Path(f.name)
 
-    yield file_path
-    file_path.unlink(missing_ok=True)
+@pytest.fixture(scope="module")
+def test_file(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    file_path = tmp_path_factory.mktemp("upload") / "test_file.txt"
+    file_path.write_bytes(b"Test file content")
+    # Файл общий для всех тестов модуля, поэтому защищен от изменения
+    file_path.chmod(0o444)
+    return file_path
 
 
-@pytest.fixture
-def test_folder() -> Generator[Path, None, None]:
-    with TemporaryDirectory() as temp_dir:
-        dir_path = Path(temp_dir)
-        for i in range(3):
-            (dir_path / f"file_{i}.txt").write_text(f"Content {i}")
-        yield dir_path
+@pytest.fixture(scope="module")
+def test_folder(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    dir_path = tmp_path_factory.mktemp("test_folder")
+    for i in range(3):
+        file_path = dir_path / f"file_{i}.txt"
+        file_path.write_bytes(f"Content {i}".encode())
+        file_path.chmod(0o444)
+    return dir_path
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def remote_test_folder(client: YandexDiskClient) -> Generator[Path, None, None]:
-    folder_name = "pytest_test_folder"
+    # При запуске через pytest-xdist у каждого воркера своя папка
+    folder_name = f"pytest_test_folder{os.environ.get('PYTEST_XDIST_WORKER', '')}"
     remote_path = Path(folder_name)
     client._ensure_path_exists(remote_path)
 
     yield remote_path
 
     try:
-        requests.delete(f"{client._base_url}/resources?path={folder_name}&permanently=true", headers=client._headers)
+        client._session.delete(client._resources_url, params={"path": folder_name, "permanently": "true"})
+        client._forget_dir(remote_path)
     except Exception as e:
-        print(f"Ошибка очистки тестовой папки: {e}")
+        logger.warning("Ошибка очистки тестовой папки: %s", e)
 
 
 def test_upload_file(client: YandexDiskClient, test_file: Path, remote_test_folder: Path) -> None:
@@ -65,7 +71,7 @@ def test_upload_file(client: YandexDiskClient, test_file: Path, remote_test_fold
 def test_upload_folder(client: YandexDiskClient, test_folder: Path, remote_test_folder: Path) -> None:
     remote_path = remote_test_folder / "test_folder"
 
-    responses = client.upload_folder(test_folder, remote_path)
+    responses = asyncio.run(client.upload_folder_async(test_folder, remote_path))
     assert all(r.status_code in (200, 201, 202) for r in responses)
 
     _, files = client.list_files(remote_path)
@@ -73,30 +79,29 @@ def test_upload_folder(client: YandexDiskClient, test_folder: Path, remote_test_
     assert len(files) == 3
 
 
-def test_download_file(client: YandexDiskClient, test_file: Path, remote_test_folder: Path) -> None:
+def test_download_file(client: YandexDiskClient, test_file: Path, remote_test_folder: Path, tmp_path: Path) -> None:
     remote_path = remote_test_folder / "download_test.txt"
     client.upload_file(test_file, remote_path)
 
-    with NamedTemporaryFile(delete=False) as tmp_file:
-        local_path = Path(tmp_file.name)
-
-    try:
-        response = client.download_file(remote_path, local_path)
-        assert response.status_code == 200
-        assert local_path.read_text() == "Test file content"
-    finally:
-        local_path.unlink(missing_ok=True)
+    local_path = tmp_path / "download_test.txt"
+    response = client.download_file(remote_path, local_path)
+    assert response.status_code == 200
+    assert local_path.read_text() == "Test file content"
 
 
 def test_list_files(client: YandexDiskClient, test_file: Path, remote_test_folder: Path) -> None:
     test_files = [remote_test_folder / f"list_file_{i}.txt" for i in range(2)]
-    for file in test_files:
-        client.upload_file(test_file, file)
+
+    async def upload_all() -> list[Response]:
+        return await asyncio.gather(*(client.upload_file_async(test_file, file) for file in test_files))
+
+    asyncio.run(upload_all())
 
     _, files = client.list_files(remote_test_folder)
     assert files is not None
     assert len(files) >= 2
-    assert all(f"list_file_{i}.txt" in [f["name"] for f in files] for i in range(2))
+    names = {f["name"] for f in files}
+    assert all(f"list_file_{i}.txt" in names for i in range(2))
 
 
 def test_path_operations(client: YandexDiskClient, remote_test_folder: Path) -> None:
@@ -0,0 +1,65 @@
+from pathlib import Path
+from typing import Any, Generator
+from unittest.mock import MagicMock
+
+import orjson
+import pytest
+from requests.models import Response
+
+from src.client.yandex_client import YandexDiskClient, _get_settings
+
+
+def make_response(status_code: int, payload: Any = None) -> Response:
+    """Собирает ответ Яндекс Диска без обращения к сети"""
+    response = Response()
+    response.status_code = status_code
+    response._content = orjson.dumps(payload) if payload is not None else b""
+    response.encoding = "utf-8"
+    return response
+
+
+@pytest.fixture
+def session() -> MagicMock:
+    session = MagicMock()
+    session.get.side_effect = lambda url, params: (
+        make_response(200, {"href": "https://uploader.example/put"}) if url.endswith("/upload") else make_response(404)
+    )
+    session.put.return_value = make_response(201)
+    return session
+
+
+@pytest.fixture
+def offline_client(session: MagicMock, monkeypatch: pytest.MonkeyPatch) -> Generator[YandexDiskClient, None, None]:
+    settings = {
+        "ACCESS_TOKEN": "token",
+        "BASE_URL": "https://cloud-api.yandex.net/v1/disk",
+        "RESOURCES_ENDPOINT": "/resources",
+        "UPLOAD_ENDPOINT": "/resources/upload",
+        "DOWNLOAD_ENDPOINT": "/resources/download",
+    }
+    for name, value in settings.items():
+        monkeypatch.setenv(f"YANDEX_{name}", value)
+    _get_settings.cache_clear()
+
+    client = YandexDiskClient()
+    client._session = session
+    yield client
+
+    _get_settings.cache_clear()
+
+
+@pytest.mark.parametrize("remote_folder", [Path("/"), Path(".")])
+def test_upload_folder_to_disk_root(
+    offline_client: YandexDiskClient, session: MagicMock, tmp_path: Path, remote_folder: Path
+) -> None:
+    """Для корня Диска и пустого пути удаленные пути собираются без префикса '/' или './'"""
+    (tmp_path / "a.txt").write_bytes(b"a")
+    (tmp_path / "sub").mkdir()
+
+    offline_client.upload_folder(tmp_path, remote_folder)
+
+    upload_paths = [c.kwargs["params"]["path"] for c in session.get.call_args_list if c.args[0].endswith("/upload")]
+    dir_paths = [c.kwargs["params"]["path"] for c in session.put.call_args_list if "params" in c.kwargs]
+    assert upload_paths == ["a.txt"]
+    assert "sub" in dir_paths
+    assert not any(path.startswith(("//", "./")) for path in upload_paths + dir_paths)